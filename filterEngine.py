@@ -0,0 +1,292 @@
+import numpy as np
+from collections import deque
+
+def _FastFFTSize(p_iMinimumSize):
+    # Next power of two, block lengths derived from the sample rate are rarely FFT friendly
+    return 1 << int(np.ceil(np.log2(max(p_iMinimumSize, 2))))
+
+# Upper bound of the raw input history a filter slot keeps for warming up a newly selected filter
+MAX_WARMUP_BLOCKS = 64
+
+class PartitionedConvolver:
+    """Arbitrary-length FIR filter using uniformly partitioned overlap-save FFT convolution.
+
+    The taps are split into partitions of one capture block each, so a block costs one forward
+    and one inverse FFT plus one complex multiply-add per partition, with no added latency.
+    """
+    def __init__(self, p_Taps, p_iBlockSize, p_iChannels):
+        taps = np.asarray(p_Taps, dtype=np.float64).ravel()
+        if len(taps) == 0:
+            raise ValueError("FIR filter needs at least one tap")
+
+        self.iBlockSize = p_iBlockSize
+        self.iFFTSize   = _FastFFTSize(2 * p_iBlockSize)
+        iPartitions     = -(-len(taps) // p_iBlockSize)
+
+        paddedTaps = np.zeros(iPartitions * p_iBlockSize)
+        paddedTaps[:len(taps)] = taps
+        self.partitionSpectra = np.fft.rfft(paddedTaps.reshape(iPartitions, p_iBlockSize), n=self.iFFTSize, axis=-1)
+
+        # Frequency domain delay line holding the spectra of the last <iPartitions> input frames
+        self.inputSpectra = np.zeros((iPartitions, p_iChannels, self.iFFTSize // 2 + 1), dtype=np.complex128)
+        self.iHead        = 0
+        self.previousBlock = np.zeros((p_iChannels, p_iBlockSize))
+
+        # The oldest partition reaches back <iPartitions> blocks
+        self.iWarmupBlocks = iPartitions
+
+    def process(self, p_Block):
+        if p_Block.shape[-1] != self.iBlockSize:
+            raise ValueError(f"Expected blocks of {self.iBlockSize} samples, got {p_Block.shape[-1]}")
+
+        # Overlap-save frame: previous block followed by the current one
+        frame = np.concatenate((self.previousBlock, p_Block), axis=-1)
+        self.previousBlock = np.array(p_Block, dtype=np.float64)
+
+        self.iHead = (self.iHead - 1) % len(self.inputSpectra)
+        self.inputSpectra[self.iHead] = np.fft.rfft(frame, n=self.iFFTSize, axis=-1)
+
+        # Slot <iHead + k> holds the frame k blocks old, which meets partition k
+        alignedPartitions = np.roll(self.partitionSpectra, self.iHead, axis=0)
+        accumulated = np.einsum('pcf,pf->cf', self.inputSpectra, alignedPartitions)
+
+        # Only the last block of the circular convolution is free of wrap-around
+        return np.fft.irfft(accumulated, n=self.iFFTSize, axis=-1)[:, self.iBlockSize:2 * self.iBlockSize]
+
+class BiquadCascade:
+    """Cascade of second-order sections with its state carried across blocks.
+
+    The cascade is run in closed form per block instead of sample by sample: the forced response
+    is the convolution with the impulse response truncated to one block (exact, as the input is
+    only one block long) and the carried state adds its zero-input response and is advanced by
+    precomputed matrices.
+    """
+    def __init__(self, p_Sections, p_iBlockSize, p_iChannels):
+        sections = np.atleast_2d(np.asarray(p_Sections, dtype=np.float64))
+        if sections.shape[-1] != 6:
+            raise ValueError("Biquad sections must be given as [b0, b1, b2, a0, a1, a2]")
+        sections = sections / sections[:, 3:4]
+
+        for section in sections:
+            if np.any(np.abs(np.roots(section[3:])) >= 1.0):
+                raise ValueError(f"Unstable biquad section {section.tolist()}")
+
+        self.iBlockSize = p_iBlockSize
+        self.iFFTSize   = _FastFFTSize(2 * p_iBlockSize)
+
+        A, B, C, D = _CascadeStateSpace(sections)
+        iOrder = len(A)
+
+        impulseResponse    = np.zeros(p_iBlockSize)
+        impulseResponse[0] = D
+        self.zeroInputResponse = np.zeros((iOrder, p_iBlockSize))  # column k is C A^k
+        self.inputToState      = np.zeros((p_iBlockSize, iOrder))  # row k is A^(L-1-k) B
+
+        C_Ak = C.copy()
+        Ak_B = B.copy()
+        for k in range(p_iBlockSize):
+            self.zeroInputResponse[:, k] = C_Ak
+            self.inputToState[p_iBlockSize - 1 - k] = Ak_B
+            if k + 1 < p_iBlockSize:
+                impulseResponse[k + 1] = C_Ak @ B
+            C_Ak = C_Ak @ A
+            Ak_B = A @ Ak_B
+
+        self.impulseSpectrum = np.fft.rfft(impulseResponse, n=self.iFFTSize)
+        self.stateTransition = np.linalg.matrix_power(A, p_iBlockSize).T
+        self.state           = np.zeros((p_iChannels, iOrder))
+
+        # Blocks until the slowest pole has decayed by 60 dB, high-Q sections ring for several blocks
+        fPoleRadius = max(np.max(np.abs(np.roots(section[3:]))) for section in sections)
+        iDecaySamples = np.log(1e-3) / np.log(fPoleRadius) if fPoleRadius > 0.0 else 0
+        self.iWarmupBlocks = min(int(np.ceil(iDecaySamples / p_iBlockSize)), MAX_WARMUP_BLOCKS)
+
+    def process(self, p_Block):
+        if p_Block.shape[-1] != self.iBlockSize:
+            raise ValueError(f"Expected blocks of {self.iBlockSize} samples, got {p_Block.shape[-1]}")
+
+        forced = np.fft.irfft(np.fft.rfft(p_Block, n=self.iFFTSize, axis=-1) * self.impulseSpectrum, n=self.iFFTSize, axis=-1)
+        output = forced[:, :self.iBlockSize] + self.state @ self.zeroInputResponse
+
+        self.state = self.state @ self.stateTransition + p_Block @ self.inputToState
+        return output
+
+def _CascadeStateSpace(p_Sections):
+    # Transposed direct form II of the first section, then each further section connected in series
+    A, B, C, D = None, None, None, None
+    for b0, b1, b2, _, a1, a2 in p_Sections:
+        As = np.array([[-a1, 1.0], [-a2, 0.0]])
+        Bs = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        Cs = np.array([1.0, 0.0])
+        Ds = b0
+
+        if A is None:
+            A, B, C, D = As, Bs, Cs, Ds
+            continue
+
+        iOrder = len(A)
+        seriesA = np.zeros((iOrder + 2, iOrder + 2))
+        seriesA[:iOrder, :iOrder] = A
+        seriesA[iOrder:, :iOrder] = np.outer(Bs, C)
+        seriesA[iOrder:, iOrder:] = As
+
+        A = seriesA
+        B = np.concatenate((B, Bs * D))
+        C = np.concatenate((Ds * C, Cs))
+        D = Ds * D
+
+    return A, B, C, D
+
+class FilterSlot:
+    """Filter selection of one window, applied on the capture thread.
+
+    Swaps requested from the GUI thread are picked up at the next block boundary. The new filter is
+    warmed up with as many past blocks as its history reaches back (<iWarmupBlocks>) and its output
+    is crossfaded with the old one over one block.
+    """
+    def __init__(self, p_iBlockSize):
+        self.sFilterName     = None
+        self.activeFilter    = None
+        self.requestedSwap   = None
+        self.appliedSwap     = None
+        self.blPassedThrough = True  # Whether the last block left the slot unfiltered
+        self.history         = deque(maxlen=MAX_WARMUP_BLOCKS)
+        self.crossfadeRamp   = np.linspace(0.0, 1.0, p_iBlockSize, endpoint=False)
+
+    def RequestFilter(self, p_sFilterName, p_Filter):
+        # The capture thread only reads <requestedSwap>, which is replaced by one assignment, so no locking is needed.
+        # <sFilterName> is for the GUI only.
+        self.sFilterName   = p_sFilterName
+        self.requestedSwap = (p_sFilterName, p_Filter)
+
+    def process(self, p_Block):
+        block = np.asarray(p_Block, dtype=np.float64)
+
+        swap = self.requestedSwap
+        if swap is not self.appliedSwap:
+            self.appliedSwap = swap
+            newFilter = swap[1]
+            if newFilter is not None and newFilter.iWarmupBlocks > 0:
+                for pastBlock in list(self.history)[-newFilter.iWarmupBlocks:]:
+                    newFilter.process(pastBlock)
+
+            oldOutput = block if self.activeFilter is None else self.activeFilter.process(block)
+            newOutput = block if newFilter is None else newFilter.process(block)
+            output = oldOutput + (newOutput - oldOutput) * self.crossfadeRamp
+            self.activeFilter = newFilter
+            self.blPassedThrough = False
+        elif self.activeFilter is None:
+            output = block
+            self.blPassedThrough = True
+        else:
+            output = self.activeFilter.process(block)
+            self.blPassedThrough = False
+
+        self.history.append(block)
+        return output
+
+def DesignBiquad(p_sKind, p_fFrequency, p_fRate, p_fQ=0.7071, p_fGainDb=0.0):
+    # Audio EQ cookbook (R. Bristow-Johnson) sections as [b0, b1, b2, a0, a1, a2]
+    w0    = 2.0 * np.pi * p_fFrequency / p_fRate
+    cosW0 = np.cos(w0)
+    alpha = np.sin(w0) / (2.0 * p_fQ)
+    A     = 10.0 ** (p_fGainDb / 40.0)
+
+    if p_sKind == "lowpass":
+        b = [(1.0 - cosW0) / 2.0, 1.0 - cosW0, (1.0 - cosW0) / 2.0]
+        a = [1.0 + alpha, -2.0 * cosW0, 1.0 - alpha]
+    elif p_sKind == "highpass":
+        b = [(1.0 + cosW0) / 2.0, -(1.0 + cosW0), (1.0 + cosW0) / 2.0]
+        a = [1.0 + alpha, -2.0 * cosW0, 1.0 - alpha]
+    elif p_sKind == "bandpass":
+        b = [alpha, 0.0, -alpha]
+        a = [1.0 + alpha, -2.0 * cosW0, 1.0 - alpha]
+    elif p_sKind == "notch":
+        b = [1.0, -2.0 * cosW0, 1.0]
+        a = [1.0 + alpha, -2.0 * cosW0, 1.0 - alpha]
+    elif p_sKind == "peaking":
+        b = [1.0 + alpha * A, -2.0 * cosW0, 1.0 - alpha * A]
+        a = [1.0 + alpha / A, -2.0 * cosW0, 1.0 - alpha / A]
+    else:
+        raise ValueError(f"Invalid biquad kind <{p_sKind}>. Use 'lowpass', 'highpass', 'bandpass', 'notch' or 'peaking'")
+
+    return b + a
+
+def _BilinearSection(p_Numerator, p_Denominator, p_fRate):
+    # Maps analog [s^2, s, 1] polynomials to a digital section, s = 2fs (1 - z^-1) / (1 + z^-1)
+    K = 2.0 * p_fRate
+    def transform(p2, p1, p0):
+        return [p2 * K * K + p1 * K + p0, 2.0 * (p0 - p2 * K * K), p2 * K * K - p1 * K + p0]
+    return transform(*p_Numerator) + transform(*p_Denominator)
+
+def _SectionResponse(p_Section, p_fFrequency, p_fRate):
+    z = np.exp(-2j * np.pi * p_fFrequency / p_fRate * np.arange(3))
+    return np.dot(p_Section[:3], z) / np.dot(p_Section[3:], z)
+
+def DesignAWeighting(p_fRate):
+    # IEC 61672 A-weighting poles, prewarped for the bilinear transform and normalized to 0 dB at 1 kHz
+    def prewarp(p_fFrequency):
+        return 2.0 * p_fRate * np.tan(np.pi * p_fFrequency / p_fRate)
+    w1, w2, w3, w4 = (prewarp(f) for f in (20.598997, 107.65265, 737.86223, 12194.217))
+
+    sections = [
+        _BilinearSection([1.0, 0.0, 0.0], [1.0, 2.0 * w1, w1 * w1], p_fRate),
+        _BilinearSection([0.0, 0.0, 1.0], [1.0, w2 + w3, w2 * w3], p_fRate),
+        _BilinearSection([1.0, 0.0, 0.0], [1.0, 2.0 * w4, w4 * w4], p_fRate),
+    ]
+
+    fGainAt1k = np.prod([abs(_SectionResponse(section, 1000.0, p_fRate)) for section in sections])
+    sections[0][:3] = [coeff / fGainAt1k for coeff in sections[0][:3]]
+    return sections
+
+def DesignWindowedSincFIR(p_sKind, p_iTaps, p_fRate, p_fCutoff=None, p_fLowCutoff=None, p_fHighCutoff=None):
+    # Blackman windowed sinc, linear phase
+    n = np.arange(p_iTaps) - (p_iTaps - 1) / 2.0
+    window = np.blackman(p_iTaps)
+
+    def lowpass(p_fFrequency):
+        fNormalized = 2.0 * p_fFrequency / p_fRate
+        return fNormalized * np.sinc(fNormalized * n) * window
+
+    if p_sKind == "lowpass":
+        return lowpass(p_fCutoff)
+    elif p_sKind == "highpass":
+        if p_iTaps % 2 == 0:
+            raise ValueError("High-pass FIR filters need an odd number of taps")
+        taps = -lowpass(p_fCutoff)
+        taps[p_iTaps // 2] += 1.0
+        return taps
+    elif p_sKind == "bandpass":
+        return lowpass(p_fHighCutoff) - lowpass(p_fLowCutoff)
+    else:
+        raise ValueError(f"Invalid FIR kind <{p_sKind}>. Use 'lowpass', 'highpass' or 'bandpass'")
+
+def BuildFilter(p_dtFilterConfig, p_iRate, p_iBlockSize, p_iChannels):
+    sType = p_dtFilterConfig["type"]
+
+    if sType == "fir":
+        if "coefficientsFile" in p_dtFilterConfig:
+            taps = np.loadtxt(p_dtFilterConfig["coefficientsFile"], ndmin=1)
+        else:
+            taps = DesignWindowedSincFIR(p_dtFilterConfig["kind"],
+                                         p_dtFilterConfig["taps"],
+                                         p_iRate,
+                                         p_fCutoff=p_dtFilterConfig.get("cutoff"),
+                                         p_fLowCutoff=p_dtFilterConfig.get("lowCutoff"),
+                                         p_fHighCutoff=p_dtFilterConfig.get("highCutoff"))
+        return PartitionedConvolver(taps, p_iBlockSize, p_iChannels)
+
+    elif sType == "biquad":
+        sections = [DesignBiquad(section["kind"],
+                                 section["frequency"],
+                                 p_iRate,
+                                 p_fQ=section.get("q", 0.7071),
+                                 p_fGainDb=section.get("gainDb", 0.0))
+                    for section in p_dtFilterConfig["sections"]]
+        return BiquadCascade(sections, p_iBlockSize, p_iChannels)
+
+    elif sType == "aweighting":
+        return BiquadCascade(DesignAWeighting(p_iRate), p_iBlockSize, p_iChannels)
+
+    else:
+        raise ValueError(f"Invalid filter type <{sType}>. Use 'fir', 'biquad' or 'aweighting'")
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 import pyaudiowpatch as pyaudio
 from utilityFunctions import LoadConfig
+from filterEngine import FilterSlot, BuildFilter
 from constants import *
 from guiFiles.mainGui import Ui_MainWindow as mainMainWindow
 import sys
@@ -17,9 +18,15 @@ if os.name == 'nt':  # Only if we are running on Windows
     k = windll.kernel32
     k.SetConsoleMode(k.GetStdHandle(-11), 7)
 
+# Window names a filter can be attached to, matching the "<name>Enabled" / "<name>Settings" keys of the config
+FILTERABLE_WINDOWS = ("TimeDomainScope", "FrequencyDomainScope", "FFTSpectrumVisualizer")
+
+# Channels handed to the windows and filters: left and right (mono input is shown on both)
+ANALYSED_CHANNELS = 2
+
 class SoundCapturer(QThread):
     sigBlockCaptured = pyqtSignal(bool)
-    sigFFTDataReady  = pyqtSignal(np.ndarray, np.ndarray)  # Signal for FFT data
+    sigFFTDataReady  = pyqtSignal(str, np.ndarray, np.ndarray)  # Signal for FFT data, tagged with the window it was filtered for
 
     def __init__(self, p_dtConfigDict):
         super(SoundCapturer, self).__init__()
@@ -68,6 +75,26 @@ class SoundCapturer(QThread):
             else:
                 raise Exception("Invalid <UseSpeakerOrMic> param. Use 'Speaker' or 'Mic'")
 
+        # One filter slot per window, so every window can look at the signal through its own filter
+        self.dtFilterSlots = {sWindowName: FilterSlot(self.iInputFramesPerBlock) for sWindowName in FILTERABLE_WINDOWS}
+        for sWindowName in FILTERABLE_WINDOWS:
+            sFilterName = self.dtConfig.get(f"{sWindowName}Settings", {}).get("filter")
+            if sFilterName is not None:
+                self.SetFilter(sWindowName, sFilterName)
+
+    def SetFilter(self, p_sWindowName, p_sFilterName):
+        # Called from the GUI thread, the filter is built here and swapped in by the capture thread
+        try:
+            newFilter = None
+            if p_sFilterName is not None:
+                newFilter = BuildFilter(self.dtConfig["Filters"][p_sFilterName], self.iRate, self.iInputFramesPerBlock, ANALYSED_CHANNELS)
+        except Exception as err:
+            print(f"-> Filter <{p_sFilterName}> could not be built for {p_sWindowName}: {err}")
+            return False
+
+        self.dtFilterSlots[p_sWindowName].RequestFilter(p_sFilterName, newFilter)
+        return True
+
     def run(self):
         with pyaudio.PyAudio() as p:
             with p.open(format=pyaudio.paInt16,
@@ -81,19 +108,33 @@ class SoundCapturer(QThread):
                 while True:
                     data = stream.read(self.iInputFramesPerBlock, exception_on_overflow=False)
                     arrayData = np.frombuffer(data, dtype=np.int16)
-                    self.leftArrayData = arrayData[0::2]
-                    self.rightArrayData = arrayData[1::2]
-
-                    if self.blRun:
-                        if self.dtConfig["TimeDomainScopeEnabled"]:
+                    # De-interleave frames and keep the first two channels, so filters always see <ANALYSED_CHANNELS> rows
+                    channelArrayData = arrayData.reshape(-1, self.NumberofChannels).T
+                    stereoArrayData = np.vstack((channelArrayData[0], channelArrayData[min(1, self.NumberofChannels - 1)]))
+
+                    # Filters are fed while paused too, so their history is current when continuing
+                    if self.dtConfig["TimeDomainScopeEnabled"]:
+                        filteredArrayData = self.dtFilterSlots["TimeDomainScope"].process(stereoArrayData)
+                        if self.blRun:
+                            self.leftArrayData, self.rightArrayData = filteredArrayData
                             # Emit signal for time domain plot
                             self.sigBlockCaptured.emit(True)
 
-                        if self.dtConfig["FrequencyDomainScopeEnabled"] or self.dtConfig["FFTSpectrumVisualizerEnabled"]:
-                            # Calculate FFT and emit signal
-                            self.perform_fft(self.leftArrayData)  # Send left channel data for FFT
-
-    def perform_fft(self, data):
+                    dtFFTInputs = {}
+                    for sWindowName in ("FrequencyDomainScope", "FFTSpectrumVisualizer"):
+                        if self.dtConfig[f"{sWindowName}Enabled"]:
+                            dtFFTInputs[sWindowName] = self.dtFilterSlots[sWindowName].process(stereoArrayData)
+
+                    if self.blRun and dtFFTInputs:
+                        # Calculate FFT and emit signal, unfiltered windows share one FFT
+                        unfilteredWindowNames = [sWindowName for sWindowName in dtFFTInputs if self.dtFilterSlots[sWindowName].blPassedThrough]
+                        if unfilteredWindowNames:
+                            self.perform_fft(unfilteredWindowNames, stereoArrayData[0])  # Send left channel data for FFT
+                        for sWindowName, filteredArrayData in dtFFTInputs.items():
+                            if sWindowName not in unfilteredWindowNames:
+                                self.perform_fft([sWindowName], filteredArrayData[0])
+
+    def perform_fft(self, windowNames, data):
         N = len(data)
         fft_data = np.fft.fft(data)
         fft_data = np.abs(fft_data[:N // 2])
@@ -102,7 +143,32 @@ class SoundCapturer(QThread):
         fft_data = np.abs(fft_data[:N // 2]) * (2.0 / N)
 
         frequencies = np.fft.fftfreq(N, 1 / self.iRate)[:N // 2]
-        self.sigFFTDataReady.emit(frequencies, fft_data)
+        for windowName in windowNames:
+            self.sigFFTDataReady.emit(windowName, frequencies, fft_data)
+
+def AddFilterMenu(p_Window, p_sWindowName):
+    # "Filter" menu listing the filters of the config, the checked one is applied to this window only
+    soundCapturer = p_Window.soundCapturer
+    filterMenu = p_Window.menuBar().addMenu("Filter")
+    filterActionGroup = QtWidgets.QActionGroup(p_Window)
+    filterActionGroup.setExclusive(True)
+
+    sCurrentFilterName = soundCapturer.dtFilterSlots[p_sWindowName].sFilterName
+    for sFilterName in [None] + list(p_Window.dtConfig.get("Filters", {})):
+        action = filterMenu.addAction("None" if sFilterName is None else sFilterName)
+        action.setCheckable(True)
+        action.setChecked(sFilterName == sCurrentFilterName)
+        action.setData(sFilterName)
+        filterActionGroup.addAction(action)
+
+    def HandleFilterSelected(p_Action):
+        if not soundCapturer.SetFilter(p_sWindowName, p_Action.data()):
+            # Keep showing the filter that is still running
+            for action in filterActionGroup.actions():
+                action.setChecked(action.data() == soundCapturer.dtFilterSlots[p_sWindowName].sFilterName)
+
+    filterActionGroup.triggered.connect(HandleFilterSelected)
+    p_Window.filterActionGroup = filterActionGroup
 
 class FFTScope(QMainWindow):
     def __init__(self, soundCapturer):
@@ -154,6 +220,8 @@ class FFTScope(QMainWindow):
         # Initialize a variable to store the persistent tooltip label
         self.persistentAnnotation = None
 
+        AddFilterMenu(self, "FrequencyDomainScope")
+
         # Connect signal for real-time FFT plotting
         self.soundCapturer.sigFFTDataReady.connect(self.update_fft_plot)
 
@@ -219,8 +287,11 @@ class FFTScope(QMainWindow):
         self.persistentAnnotation.setPos(x, y)
         self.plotWidget.plotItem.addItem(self.persistentAnnotation)
 
-    @pyqtSlot(np.ndarray, np.ndarray)
-    def update_fft_plot(self, frequencies, fft_data):
+    @pyqtSlot(str, np.ndarray, np.ndarray)
+    def update_fft_plot(self, windowName, frequencies, fft_data):
+        if windowName != "FrequencyDomainScope":
+            return  # Filtered for another window
+
         # Update the max peak values by comparing current FFT data with previously held max
         self.maxPeaks = np.maximum(self.maxPeaks, fft_data)
 
@@ -277,6 +348,8 @@ class Scope(QMainWindow):
         block_duration = self.dtConfig["InputBlockTimeInSeconds"]
         self.timeAxis = np.linspace(0, block_duration, self.soundCapturer.iInputFramesPerBlock)
 
+        AddFilterMenu(self, "TimeDomainScope")
+
         # Connect signal for real-time plotting
         self.soundCapturer.sigBlockCaptured.connect(self.update_plot)
 
@@ -336,6 +409,8 @@ class FFTBarVisualizer(QMainWindow):
         # Initialize a variable to store the persistent tooltip label
         self.persistentAnnotation = None
 
+        AddFilterMenu(self, "FFTSpectrumVisualizer")
+
         # Connect signal for real-time FFT plotting
         self.soundCapturer.sigFFTDataReady.connect(self.update_bar_graph)
 
@@ -401,8 +476,11 @@ class FFTBarVisualizer(QMainWindow):
         self.persistentAnnotation.setPos(x, y)
         self.plotWidget.plotItem.addItem(self.persistentAnnotation)
 
-    @pyqtSlot(np.ndarray, np.ndarray)
-    def update_bar_graph(self, frequencies, fft_data):
+    @pyqtSlot(str, np.ndarray, np.ndarray)
+    def update_bar_graph(self, windowName, frequencies, fft_data):
+        if windowName != "FFTSpectrumVisualizer":
+            return  # Filtered for another window
+
         # Update max peaks for reference (optional)
         self.maxPeaks = np.maximum(self.maxPeaks, fft_data)
 